@@ -5,158 +5,325 @@ Scrapes articles from Mercer's HR View Content page and generates an RSS feed.
 Preserves original discovery dates for articles.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
+import asyncio
+from selectolax.lexbor import LexborHTMLParser
 from datetime import datetime
-import time
-import json
+from urllib.parse import urlsplit, urlunsplit
+import orjson
 import os
 
 # Configuration
 BASE_URL = "https://taap.mercer.com/en-us/resources/hr-view-content/"
 MAX_PAGES = 3  # Scrape first 3 pages (30 most recent articles)
-DELAY_SECONDS = 1  # Delay between page requests
-DATES_FILE = 'article_dates.json'  # Store article discovery dates
+MAX_CONCURRENT = 2  # Limit simultaneous page requests (politeness)
+DATES_FILE = 'article_dates.json'  # Snapshot of article discovery dates
+DATES_LOG_FILE = 'article_dates.jsonl'  # Append-only log of new discoveries since the snapshot
+PAGE_CACHE_FILE = 'page_cache.json'  # Store per-page ETag/Last-Modified and extracted articles
+USER_AGENT = 'mercer-rss-feed/1.0 (+https://github.com/jimholincheck/mercer-rss-feed)'
+ARTICLE_SELECTOR = 'a[href*="/apps/ppa/article/"]'  # Matched in C by Lexbor, no Python callback
 
 def load_article_dates():
-    """Load previously saved article dates from JSON file."""
+    """Load article dates: the JSON snapshot plus the append-only log."""
+    dates = {}
     if os.path.exists(DATES_FILE):
         try:
-            with open(DATES_FILE, 'r') as f:
-                return json.load(f)
+            with open(DATES_FILE, 'rb') as f:
+                dates = orjson.loads(f.read())
         except Exception as e:
             print(f"Warning: Could not load dates file: {e}")
-            return {}
-    return {}
+    if os.path.exists(DATES_LOG_FILE):
+        try:
+            with open(DATES_LOG_FILE, 'rb') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entry = orjson.loads(line)
+                        dates[entry['url']] = entry['date']  # last write wins
+        except Exception as e:
+            print(f"Warning: Could not load dates log: {e}")
+    return dates
+
+def append_article_date(url, date):
+    """Record one newly discovered article date in the append-only log."""
+    try:
+        with open(DATES_LOG_FILE, 'ab') as f:
+            f.write(orjson.dumps({'url': url, 'date': date}) + b'\n')
+    except Exception as e:
+        print(f"Warning: Could not append to dates log: {e}")
 
 def save_article_dates(dates_dict):
-    """Save article dates to JSON file."""
+    """Save article dates snapshot to JSON file."""
     try:
-        with open(DATES_FILE, 'w') as f:
-            json.dump(dates_dict, f, indent=2)
+        with open(DATES_FILE, 'wb') as f:
+            f.write(orjson.dumps(dates_dict, option=orjson.OPT_INDENT_2))
     except Exception as e:
         print(f"Warning: Could not save dates file: {e}")
 
-def scrape_articles(max_pages=MAX_PAGES):
+def compact_article_dates(dates_dict):
+    """Fold the log into the snapshot once the log outgrows the snapshot."""
+    try:
+        log_size = os.path.getsize(DATES_LOG_FILE) if os.path.exists(DATES_LOG_FILE) else 0
+        snapshot_size = os.path.getsize(DATES_FILE) if os.path.exists(DATES_FILE) else 0
+        if log_size and log_size >= snapshot_size:
+            save_article_dates(dates_dict)
+            # Truncate rather than remove - the (possibly empty) log file
+            # stays tracked so the workflow's git add never misses
+            open(DATES_LOG_FILE, 'wb').close()
+            print(f"Compacted dates log into snapshot ({len(dates_dict)} total)")
+    except Exception as e:
+        print(f"Warning: Could not compact dates log: {e}")
+
+def load_page_cache():
+    """Load per-page HTTP validators and cached articles from JSON file."""
+    if os.path.exists(PAGE_CACHE_FILE):
+        try:
+            with open(PAGE_CACHE_FILE, 'rb') as f:
+                return orjson.loads(f.read())
+        except Exception as e:
+            print(f"Warning: Could not load page cache file: {e}")
+            return {}
+    return {}
+
+def save_page_cache(page_cache):
+    """Save per-page HTTP validators and cached articles to JSON file."""
+    try:
+        with open(PAGE_CACHE_FILE, 'wb') as f:
+            f.write(orjson.dumps(page_cache, option=orjson.OPT_INDENT_2))
+    except Exception as e:
+        print(f"Warning: Could not save page cache file: {e}")
+
+async def fetch_page(session, semaphore, page_num, cached=None):
+    """
+    Fetch a single pagination page and extract its articles.
+
+    Sends If-None-Match/If-Modified-Since from the page cache when
+    available. Returns (status, entries, validators); on 304 Not Modified
+    entries and validators are None and the cached articles can be reused.
+    """
+    # Construct URL for pagination
+    if page_num == 1:
+        url = BASE_URL
+    else:
+        url = f"{BASE_URL}?page={page_num}"
+
+    print(f"Scraping page {page_num}: {url}")
+
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    async with semaphore:
+        async with session.get(url, headers=headers,
+                               timeout=aiohttp.ClientTimeout(total=30)) as response:
+            if response.status == 304:
+                return 304, None, None
+            response.raise_for_status()
+            status = response.status
+            # aiohttp's header multidict is case-insensitive; pull just the
+            # validators here so the wire casing never matters
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            page_html = await response.read()
+
+    # Parse here rather than after the gather, so each page's body is
+    # freed as soon as its articles are extracted instead of every page's
+    # bytes staying resident until all fetches finish
+    return status, extract_articles(page_html), validators
+
+def canonicalize_url(url):
+    """
+    Reduce a URL to its canonical form for deduplication.
+
+    Lowercases the host and drops the query string, fragment, and any
+    trailing slash, so the same article reached with different tracking
+    parameters is only counted once.
+    """
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc.lower(),
+                       parts.path.rstrip('/'), '', ''))
+
+def extract_articles(page_html):
+    """
+    Parse one page of HTML and extract raw article entries.
+
+    Returns a list of dictionaries with title, link, and description
+    (dates and deduplication are handled by the caller).
+    """
+    entries = []
+    tree = LexborHTMLParser(page_html)
+
+    # Find all article links (substring match runs inside the C selector engine)
+    for link in tree.css(ARTICLE_SELECTOR):
+        article_url = (link.attributes.get('href') or '').strip()
+        if not article_url:
+            continue
+
+        # Make URL absolute - a single branch on the first character
+        # replaces the old pair of startswith checks
+        if article_url[0] == '/':
+            article_url = f"https://taap.mercer.com{article_url}"
+        elif article_url[:4] != 'http':
+            article_url = f"https://taap.mercer.com/{article_url}"
+
+        # Extract title (link text)
+        title = link.text(strip=True)
+
+        # Try to find description among the link's direct siblings - a
+        # descendant search could scan a whole section when the parent is
+        # a large container
+        description = ""
+        parent = link.parent
+        if parent:
+            for child in parent.iter(include_text=False):
+                if child.tag == 'p' or (
+                        child.tag == 'div' and
+                        'description' in (child.attributes.get('class') or '').split()):
+                    description = child.text(strip=True)
+                    break
+
+        if not description:
+            description = title  # Fallback to title
+
+        entries.append({
+            'title': title,
+            'link': article_url,
+            'description': description
+        })
+
+    return entries
+
+async def scrape_articles(max_pages=MAX_PAGES):
     """
     Scrape articles from Mercer HR content pages.
-    
+
     Args:
         max_pages: Number of pages to scrape (default: 3)
-    
+
     Returns:
         List of article dictionaries with title, link, description, and pubDate
     """
     articles = []
     seen_links = set()
-    
-    # Load existing article dates
+
+    # Load existing article dates and page cache
     article_dates = load_article_dates()
+    page_cache = load_page_cache()
     current_time = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')
     dates_updated = False
-    
+    cache_updated = False
+
     print(f"Starting scrape of {max_pages} pages...")
     print(f"Loaded {len(article_dates)} existing article dates")
-    
-    for page_num in range(1, max_pages + 1):
-        # Construct URL for pagination
-        if page_num == 1:
-            url = BASE_URL
-        else:
-            url = f"{BASE_URL}?page={page_num}"
-        
-        print(f"Scraping page {page_num}: {url}")
-        
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all article links
-            article_links = soup.find_all('a', href=lambda x: x and '/apps/ppa/article/' in x)
-            
-            page_count = 0
-            for link in article_links:
-                article_url = link.get('href')
-                
-                # Make URL absolute if it's relative
-                if article_url.startswith('/'):
-                    article_url = f"https://taap.mercer.com{article_url}"
-                
-                # Ensure URL has proper protocol
-                if not article_url.startswith('http'):
-                    article_url = f"https://taap.mercer.com{article_url}"
-                
-                # Clean up any potential issues
-                article_url = article_url.strip()
-                
-                # Skip duplicates
-                if article_url in seen_links:
-                    continue
-                
-                seen_links.add(article_url)
-                
-                # Extract title (link text)
-                title = link.get_text(strip=True)
-                
-                # Try to find description
-                description = ""
-                parent = link.find_parent()
-                if parent:
-                    desc_elem = parent.find('p') or parent.find('div', class_='description')
-                    if desc_elem:
-                        description = desc_elem.get_text(strip=True)
-                
-                if not description:
-                    description = title  # Fallback to title
-                
-                # Check if we've seen this article before
-                if article_url in article_dates:
-                    # Use existing date
-                    pub_date = article_dates[article_url]
-                else:
-                    # New article - use current time and save it
-                    pub_date = current_time
-                    article_dates[article_url] = pub_date
-                    dates_updated = True
-                    print(f"  NEW article discovered: {title[:50]}...")
-                
-                articles.append({
-                    'title': title,
-                    'link': article_url,
-                    'description': description,
-                    'pubDate': pub_date
-                })
-                page_count += 1
-            
-            print(f"  Found {page_count} articles on page {page_num}")
-            
-            # Rate limiting
-            if page_num < max_pages:
-                time.sleep(DELAY_SECONDS)
-                
-        except requests.RequestException as e:
-            print(f"Error scraping page {page_num}: {e}")
+
+    # Fetch all pages concurrently; the semaphore keeps us polite
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+    # One session for the whole run so the keep-alive connection (and its
+    # TCP+TLS handshake) is reused across every page fetch
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector,
+                                     headers={'User-Agent': USER_AGENT}) as session:
+        tasks = [fetch_page(session, semaphore, page_num,
+                            cached=page_cache.get(str(page_num)))
+                 for page_num in range(1, max_pages + 1)]
+        pages = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for page_num, result in enumerate(pages, start=1):
+        if isinstance(result, Exception):
+            print(f"Error scraping page {page_num}: {result}")
             continue
-    
-    # Save updated dates if we found new articles
+
+        status, entries, validators = result
+
+        if status == 304:
+            # Page unchanged since last run - skip the parse entirely
+            entries = page_cache[str(page_num)].get('articles', [])
+            print(f"  Page {page_num} not modified, reusing {len(entries)} cached articles")
+        else:
+            page_cache[str(page_num)] = {
+                'etag': validators['etag'],
+                'last_modified': validators['last_modified'],
+                'articles': entries
+            }
+            cache_updated = True
+
+        page_count = 0
+        for entry in entries:
+            article_url = entry['link']
+
+            # Skip duplicates (canonical form catches the same article
+            # reached with different tracking parameters)
+            canonical = canonicalize_url(article_url)
+            if canonical in seen_links:
+                continue
+
+            seen_links.add(canonical)
+
+            # Check if we've seen this article before
+            if article_url in article_dates:
+                # Use existing date
+                pub_date = article_dates[article_url]
+            else:
+                # New article - use current time and log it
+                pub_date = current_time
+                article_dates[article_url] = pub_date
+                append_article_date(article_url, pub_date)
+                dates_updated = True
+                print(f"  NEW article discovered: {entry['title'][:50]}...")
+
+            articles.append({
+                'title': entry['title'],
+                'link': article_url,
+                'description': entry['description'],
+                'pubDate': pub_date
+            })
+            page_count += 1
+
+        print(f"  Found {page_count} articles on page {page_num}")
+
+    # New dates were appended to the log as they were found; fold the log
+    # into the snapshot once it has grown large enough
     if dates_updated:
-        save_article_dates(article_dates)
-        print(f"\nSaved updated article dates ({len(article_dates)} total)")
-    
+        print(f"\nLogged new article dates ({len(article_dates)} total)")
+    compact_article_dates(article_dates)
+
+    # Save refreshed validators/articles for pages that returned 200
+    if cache_updated:
+        save_page_cache(page_cache)
+
     print(f"\nTotal articles scraped: {len(articles)}")
     return articles
 
+# Translation table for escape_xml - one C-level pass instead of five replaces
+_XML_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&apos;'
+})
+
 def escape_xml(text):
     """Escape special XML characters"""
     if not text:
         return ""
-    return (text.replace('&', '&amp;')
-                .replace('<', '&lt;')
-                .replace('>', '&gt;')
-                .replace('"', '&quot;')
-                .replace("'", '&apos;'))
+    return text.translate(_XML_TABLE)
+
+# Template for a complete RSS <item> block - formatted once per article
+_ITEM_TEMPLATE = (
+    '    <item>\n'
+    '      <title>{title}</title>\n'
+    '      <link>{link}</link>\n'
+    '      <description><![CDATA[{description}]]></description>\n'
+    '      <guid isPermaLink="true">{link}</guid>\n'
+    '      <pubDate>{pub_date}</pubDate>\n'
+    '    </item>\n'
+)
 
 def generate_rss_feed(articles, output_file='mercer_feed.xml'):
     """
@@ -166,35 +333,38 @@ def generate_rss_feed(articles, output_file='mercer_feed.xml'):
         articles: List of article dictionaries
         output_file: Output filename for RSS feed
     """
-    
+
+    # Format the build timestamp once, outside the item loop
+    now_str = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')
+
     # Build RSS feed manually to support CDATA for HTML content
-    xml_lines = ['<?xml version="1.0" encoding="UTF-8"?>']
-    xml_lines.append('<rss version="2.0">')
-    xml_lines.append('  <channel>')
-    xml_lines.append(f'    <title>Mercer TAAP Blog</title>')
-    xml_lines.append(f'    <link>{BASE_URL}</link>')
-    xml_lines.append(f'    <description>Latest HR articles, alerts, and legislative updates from Mercer TAAP</description>')
-    xml_lines.append(f'    <language>en-us</language>')
-    xml_lines.append(f'    <lastBuildDate>{datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")}</lastBuildDate>')
-    
-    # Add articles as items
-    for article in articles:
-        xml_lines.append('    <item>')
-        xml_lines.append(f'      <title>{escape_xml(article["title"])}</title>')
-        xml_lines.append(f'      <link>{escape_xml(article["link"])}</link>')
-        # Don't escape content inside CDATA - CDATA handles special chars
-        xml_lines.append(f'      <description><![CDATA[{article["description"]}]]></description>')
-        xml_lines.append(f'      <guid isPermaLink="true">{escape_xml(article["link"])}</guid>')
-        xml_lines.append(f'      <pubDate>{article["pubDate"]}</pubDate>')
-        xml_lines.append('    </item>')
-    
-    xml_lines.append('  </channel>')
-    xml_lines.append('</rss>')
-    
-    # Write to file
+    header = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0">\n'
+        '  <channel>\n'
+        '    <title>Mercer TAAP Blog</title>\n'
+        f'    <link>{BASE_URL}</link>\n'
+        '    <description>Latest HR articles, alerts, and legislative updates from Mercer TAAP</description>\n'
+        '    <language>en-us</language>\n'
+        f'    <lastBuildDate>{now_str}</lastBuildDate>\n'
+    )
+
+    # Stream the items straight to the file - writelines over a generator
+    # keeps only one formatted item in memory at a time
+    # (description is inside CDATA, so it is not escaped)
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(xml_lines))
-    
+        f.write(header)
+        f.writelines(
+            _ITEM_TEMPLATE.format(
+                title=escape_xml(article['title']),
+                link=escape_xml(article['link']),
+                description=article['description'],
+                pub_date=article['pubDate']
+            )
+            for article in articles
+        )
+        f.write('  </channel>\n</rss>')
+
     print(f"\nRSS feed generated: {output_file}")
     print(f"Total items in feed: {len(articles)}")
 
@@ -206,7 +376,7 @@ def main():
     print()
     
     # Scrape articles
-    articles = scrape_articles(max_pages=MAX_PAGES)
+    articles = asyncio.run(scrape_articles(max_pages=MAX_PAGES))
     
     if not articles:
         print("No articles found. Check the website structure or your internet connection.")